@@ -1,17 +1,21 @@
 #!/usr/bin/env python
 
 import os
+import re
 from setuptools import setup
 
 
-VERSION = '2.0'
-
-
 def read(fname):
     """ Return content of specified file """
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
 
+# Extracted from the source instead of importing the package, so install-time
+# dependencies (psycopg2, gevent, sqlize-pg) are not needed to build
+VERSION = re.search(r"__version__\s*=\s*['\"]([^'\"]+)['\"]",
+                    read('squery_pg/__init__.py')).group(1)
+
+
 setup(
     name='squery-pg',
     version=VERSION,
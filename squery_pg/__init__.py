@@ -1 +1,3 @@
 from .squery_pg import Database, DatabaseContainer
+
+__version__ = '2.0'
@@ -14,7 +14,6 @@ This software is free software licensed under the terms of GPLv3. See COPYING
 file that comes with the source code, or http://www.gnu.org/licenses/gpl.txt.
 """
 
-import importlib
 import logging
 import os
 import re
@@ -25,14 +24,19 @@ import sqlize_pg
 
 
 PYMOD_RE = re.compile(r'^((\d{2})_(\d{2})_[^.]+)\.pyc?$', re.I)
+# Plain tuple cursor; cheaper than the pool's default DictCursor when rows
+# are only indexed by position
+TUPLE_CURSOR = psycopg2.extensions.cursor
 VERSION_MULTIPLIER = 10000
 MIGRATION_TABLE = 'migrations'
-GET_VERSION_SQL = sqlize_pg.Select(what='version',
-                                   sets=MIGRATION_TABLE,
-                                   where='name = %(name)s')
+# Serialized once at import: load_applied sends GET_ALL_VERSIONS_SQL through
+# the query wrapper's string fast path, and run_migration feeds SET_VERSION_SQL
+# to a raw cursor, which needs a plain string anyway
+GET_ALL_VERSIONS_SQL = sqlize_pg.Select(what=['name', 'version'],
+                                        sets=MIGRATION_TABLE).serialize()
 SET_VERSION_SQL = sqlize_pg.Replace(table=MIGRATION_TABLE,
                                     constraints=('name',),
-                                    cols=('name', 'version'))
+                                    cols=('name', 'version')).serialize()
 CREATE_MIGRATION_TABLE_SQL = """
 CREATE TABLE {table:s}
 (
@@ -40,6 +44,18 @@ CREATE TABLE {table:s}
     version integer null
 );
 """.format(table=MIGRATION_TABLE)
+PREPARE_VERSION_SQL = """
+PREPARE squery_get_version (varchar) AS
+    SELECT version FROM {table:s} WHERE name = $1;
+PREPARE squery_set_version (varchar, integer) AS
+    INSERT INTO {table:s} (name, version) VALUES ($1, $2)
+    ON CONFLICT (name) DO UPDATE SET version = $2;
+""".format(table=MIGRATION_TABLE)
+EXECUTE_GET_VERSION_SQL = 'EXECUTE squery_get_version (%(name)s);'
+EXECUTE_SET_VERSION_SQL = 'EXECUTE squery_set_version (%(name)s, %(version)s);'
+
+
+_MOD_CACHE = {}
 
 
 def get_mods(package):
@@ -47,17 +63,28 @@ def get_mods(package):
 
     This function looks inside the specified directory for all files that look
     like Python modules with a numeric prefix and returns them. It will omit
-    any duplicates and return file names without extension.
+    any duplicates and return file names without extension. Results are cached
+    per directory and reused for as long as the directory is not modified.
 
     :param package: package object
     :returns:       list of tuples containing filename without extension,
                     major_version and minor_version
     """
     pkgdir = package.__path__[0]
-    matches = filter(None, [PYMOD_RE.match(f) for f in os.listdir(pkgdir)])
-    parse_match = lambda groups: (groups[0], int(groups[1]), int(groups[2]))
-    return sorted(list(set([parse_match(m.groups()) for m in matches])),
-                  key=lambda x: (x[1], x[2]))
+    cache_key = (pkgdir, os.stat(pkgdir).st_mtime_ns)
+    try:
+        return _MOD_CACHE[cache_key]
+    except KeyError:
+        pass
+    seen = set()
+    for entry in os.scandir(pkgdir):
+        match = PYMOD_RE.match(entry.name)
+        if match:
+            (modname, major_version, minor_version) = match.groups()
+            seen.add((modname, int(major_version), int(minor_version)))
+    mods = sorted(seen, key=lambda x: (x[1], x[2]))
+    _MOD_CACHE[cache_key] = mods
+    return mods
 
 
 def get_new(modules, min_major_version, min_minor_version):
@@ -94,6 +121,7 @@ def load_mod(module, package):
     :param package: package object
     :returns:       module object
     """
+    import importlib
     name = '%s.%s' % (package.__name__, module)
     if name in sys.modules:
         return sys.modules[name]
@@ -108,18 +136,60 @@ def pack_version(major_version, minor_version):
 def unpack_version(version):
     """Unpack a single version integer into the two major and minor
     components."""
-    minor_version = version % VERSION_MULTIPLIER
-    major_version = (version - minor_version) / VERSION_MULTIPLIER
+    (major_version, minor_version) = divmod(version, VERSION_MULTIPLIER)
     return (major_version, minor_version)
 
 
 def recreate(db, name):
     db.recreate()
     db.executescript(CREATE_MIGRATION_TABLE_SQL)
-    db.execute(SET_VERSION_SQL, dict(name=name, version=0))
+    set_version(db, name, 0, 0)
     return (0, 0)
 
 
+def prepare_version_statements(cursor):
+    """ Prepare the version lookup and update statements on the cursor's
+    connection, once per connection. Subsequent calls over the same connection
+    skip straight to EXECUTE, avoiding the server-side parse and plan cycle.
+
+    :param cursor:  database cursor
+    """
+    conn = cursor.connection
+    if not getattr(conn, '_version_statements_prepared', False):
+        cursor.execute(PREPARE_VERSION_SQL)
+        conn._version_statements_prepared = True
+
+
+def run_version_statement(db, sql, params, fetch=False):
+    """ Execute one of the prepared version statements in its own transaction.
+
+    PREPARE is transactional: if the transaction that prepared the statements
+    rolls back, they are deallocated while the per-connection flag stays set.
+    When that happens the EXECUTE fails with InvalidSqlStatementName, so clear
+    the flag and retry once, which re-prepares on the same connection.
+
+    :param db:      connetion object
+    :param sql:     EXECUTE statement to run
+    :param params:  statement parameters
+    :param fetch:   whether to return the first result row
+    :returns:       first result row if ``fetch`` is set, ``None`` otherwise
+    """
+    retried = False
+    while True:
+        conn = None
+        try:
+            with db.transaction(cursor_factory=TUPLE_CURSOR) as cursor:
+                conn = cursor.connection
+                prepare_version_statements(cursor)
+                cursor.execute(sql, params)
+                return cursor.fetchone() if fetch else None
+        except psycopg2.errors.InvalidSqlStatementName:
+            if retried or conn is None:
+                raise
+            conn._version_statements_prepared = False
+            retried = True
+
+
 def get_version(db, name):
     """ Query database and return migration version. WARNING: side effecting
     function! if no version information can be found, any existing database
@@ -130,7 +200,8 @@ def get_version(db, name):
     :returns:       current migration version
     """
     try:
-        result = db.fetchone(GET_VERSION_SQL, dict(name=name))
+        result = run_version_statement(db, EXECUTE_GET_VERSION_SQL,
+                                       dict(name=name), fetch=True)
     except psycopg2.ProgrammingError as exc:
         if 'does not exist' in str(exc):
             return recreate(db, name)
@@ -139,10 +210,35 @@ def get_version(db, name):
         if result is None:
             set_version(db, name, 0, 0)
             return (0, 0)
-        version = result['version']
+        version = result[0]
         return unpack_version(version)
 
 
+def load_applied(db, name):
+    """ Load migration versions for all known names in a single query.
+    WARNING: side effecting function! if no version information can be found,
+    any existing database matching the passed one's name will be deleted and
+    recreated.
+
+    :param db:      connetion object
+    :param name:    associated name
+    :returns:       dict mapping each name to its current migration version
+    """
+    try:
+        result = db.fetchall(GET_ALL_VERSIONS_SQL, cursor_factory=TUPLE_CURSOR)
+    except psycopg2.ProgrammingError as exc:
+        if 'does not exist' in str(exc):
+            return {name: recreate(db, name)}
+        raise
+    else:
+        versions = dict((row[0], unpack_version(row[1] or 0))
+                        for row in result)
+        if name not in versions:
+            set_version(db, name, 0, 0)
+            versions[name] = (0, 0)
+        return versions
+
+
 def set_version(db, name, major_version, minor_version):
     """ Set database migration version
 
@@ -152,7 +248,8 @@ def set_version(db, name, major_version, minor_version):
     :param minor_version:  integer minor version of migration
     """
     version = pack_version(major_version, minor_version)
-    db.execute(SET_VERSION_SQL, dict(name=name, version=version))
+    run_version_statement(db, EXECUTE_SET_VERSION_SQL,
+                          dict(name=name, version=version))
 
 
 def run_migration(name, major_version, minor_version, db, mod, conf={}):
@@ -164,9 +261,14 @@ def run_migration(name, major_version, minor_version, db, mod, conf={}):
     :param path:          path of the migration script
     :param conf:          application configuration (if any)
     """
-    with db.transaction():
+    version = pack_version(major_version, minor_version)
+    with db.transaction() as cursor:
         mod.up(db, conf)
-        set_version(db, name, major_version, minor_version)
+        # Piggyback the version bump onto the migration's own cursor instead
+        # of paying for a separate ``set_version`` round-trip. The plain
+        # statement is used rather than the prepared one: a PREPARE issued
+        # here would be deallocated if the migration rolls back
+        cursor.execute(SET_VERSION_SQL, dict(name=name, version=version))
 
 
 def migrate(db, name, package, conf={}):
@@ -179,7 +281,9 @@ def migrate(db, name, package, conf={}):
     :param package:         package that contains the migrations
     :param conf:            application configuration object
     """
-    (current_major_version, current_minor_version) = get_version(db, name)
+    import importlib
+    applied = load_applied(db, name)
+    (current_major_version, current_minor_version) = applied[name]
     package = importlib.import_module(package)
     logging.debug('Migration version for %s is %s.%s',
                   package.__name__,
@@ -9,28 +9,38 @@ import sys
 import contextlib
 
 import gevent
-from gevent.queue import Queue
+from gevent.queue import LifoQueue
 from gevent.socket import wait_read, wait_write
 from psycopg2 import extensions, OperationalError, connect
 
 
-if sys.version_info[0] >= 3:
-    integer_types = int,
-else:
-    import __builtin__
-    integer_types = int, __builtin__.long
+# Marks "no level to restore"; can't use None for that since None is itself a
+# valid isolation level (the server default)
+UNSET = object()
 
 
-def gevent_wait_callback(conn, timeout=None):
-    """A wait callback useful to allow gevent to work with Psycopg."""
+def gevent_wait_callback(conn, timeout=None,
+                         POLL_OK=extensions.POLL_OK,
+                         POLL_READ=extensions.POLL_READ,
+                         POLL_WRITE=extensions.POLL_WRITE,
+                         wait_read=wait_read,
+                         wait_write=wait_write):
+    """A wait callback useful to allow gevent to work with Psycopg.
+
+    This is a hot loop hit on every query; the default arguments bind the
+    poll constants and wait functions as locals to skip the global lookups
+    on each iteration.
+    """
+    poll = conn.poll
+    fd = conn.fileno()
     while 1:
-        state = conn.poll()
-        if state == extensions.POLL_OK:
+        state = poll()
+        if state == POLL_OK:
             break
-        elif state == extensions.POLL_READ:
-            wait_read(conn.fileno(), timeout=timeout)
-        elif state == extensions.POLL_WRITE:
-            wait_write(conn.fileno(), timeout=timeout)
+        elif state == POLL_READ:
+            wait_read(fd, timeout=timeout)
+        elif state == POLL_WRITE:
+            wait_write(fd, timeout=timeout)
         else:
             raise OperationalError(
                 "Bad result from poll: %r" % state)
@@ -41,30 +51,28 @@ extensions.set_wait_callback(gevent_wait_callback)
 
 class DatabaseConnectionPool(object):
 
-    def __new__(cls, *args, **kwargs):
-        cls = super(DatabaseConnectionPool, cls).__new__(cls, *args, **kwargs)
-        # Depending on the maxsize argument, we will set up the class to be
-        # either a fake connection pool that uses only one connection object,
-        # or a real connection pool powered by gevent.
-        if kwargs.get('maxsize') == 1:
-            cls.get = cls.single_get
-            cls.put = cls.single_put
-            cls.closeall = cls.single_closeall
-        else:
-            cls.get = cls.multi_get
-            cls.put = cls.multi_put
-            cls.closeall = cls.multi_closeall
-        return cls
-
     def __init__(self, maxsize=100):
-        if not isinstance(maxsize, integer_types):
+        if not isinstance(maxsize, int):
             raise TypeError('Expected integer, got %r' % (maxsize, ))
         self.maxsize = maxsize
+        # Depending on the maxsize argument, we will set up the instance to
+        # be either a fake connection pool that uses only one connection
+        # object, or a real connection pool powered by gevent. The bound
+        # methods are stored on the instance, which both avoids per-call
+        # descriptor resolution and keeps sibling pools independent.
         if self.maxsize == 1:
             self._conn = None
             self.pool = None
+            self.get = self.single_get
+            self.put = self.single_put
+            self.closeall = self.single_closeall
         else:
-            self.pool = Queue()
+            # LIFO keeps a hot subset of connections in rotation, which
+            # preserves server-side caches on the most recently used ones
+            self.pool = LifoQueue()
+            self.get = self.multi_get
+            self.put = self.multi_put
+            self.closeall = self.multi_closeall
         self.size = 0
 
     # The following methods are used for single-connection mode.
@@ -112,12 +120,21 @@ class DatabaseConnectionPool(object):
     @contextlib.contextmanager
     def connection(self, isolation_level=None):
         conn = self.get()
+        restore_level = UNSET
+        restore_autocommit = False
         try:
-            if isolation_level is not None:
-                if conn.isolation_level == isolation_level:
-                    isolation_level = None
-                else:
-                    conn.set_isolation_level(isolation_level)
+            if isolation_level == extensions.ISOLATION_LEVEL_AUTOCOMMIT:
+                # Autocommit is a separate connection flag in psycopg2 >= 2.7
+                # that the isolation_level property never reports, so the
+                # override has to be applied (and skipped) through the flag
+                # itself; toggling it is pure client-side state
+                if not conn.autocommit:
+                    conn.autocommit = True
+                    restore_autocommit = True
+            elif (isolation_level is not None and
+                    conn.isolation_level != isolation_level):
+                restore_level = conn.isolation_level
+                conn.set_isolation_level(isolation_level)
             yield conn
         except:
             if conn.closed:
@@ -133,8 +150,13 @@ class DatabaseConnectionPool(object):
             conn.commit()
         finally:
             if conn is not None and not conn.closed:
-                if isolation_level is not None:
-                    conn.set_isolation_level(isolation_level)
+                if restore_autocommit:
+                    conn.autocommit = False
+                if restore_level is not UNSET:
+                    # Assigning the property accepts None (server default),
+                    # but it leaves the autocommit flag untouched, which is
+                    # why that flag is saved and restored separately
+                    conn.isolation_level = restore_level
                 self.put(conn)
 
     @contextlib.contextmanager
@@ -172,14 +194,11 @@ class DatabaseConnectionPool(object):
             return cursor.fetchall()
 
     def fetchiter(self, *args, **kwargs):
+        # Pass name='...' to use a named (server-side) cursor so PostgreSQL
+        # streams the rows instead of buffering them client-side
         with self.cursor(**kwargs) as cursor:
             cursor.execute(*args)
-            while True:
-                items = cursor.fetchmany()
-                if not items:
-                    break
-                for item in items:
-                    yield item
+            yield from cursor
 
 
 class PostgresConnectionPool(DatabaseConnectionPool):
@@ -10,20 +10,18 @@ file that comes with the source code, or http://www.gnu.org/licenses/gpl.txt.
 
 from __future__ import print_function
 
+import atexit
 import inspect
 import functools
 import re
 
 import psycopg2
 
-from psycopg2.extras import DictCursor
-
 from sqlize_pg import (From, Where, Group, Order, Limit, Select, Update,
                        Delete, Insert, Replace, sqlin, sqlarray)
 
 from .utils import basestring
 from .migrations import migrate
-from .pool import PostgresConnectionPool
 
 
 AUTOCOMMIT = psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT
@@ -32,16 +30,55 @@ MAX_VARIABLE_NUMBER = 999
 DEFAULT_MAX_POOL_SIZE = 5
 
 
-psycopg2.extensions.register_type(psycopg2.extensions.UNICODE)
-psycopg2.extensions.register_type(psycopg2.extensions.UNICODEARRAY)
+@functools.lru_cache(maxsize=256)
+def get_valid_args(f):
+    return frozenset(inspect.signature(f).parameters)
 
 
 def call_relevant_args(f, kwargs):
-    valid_args = inspect.getargspec(f).args
+    valid_args = get_valid_args(f)
     relevant_args = {k: v for k, v in kwargs.items() if k in valid_args}
     f(**relevant_args)
 
 
+_ADMIN_POOLS = {}
+
+
+def get_admin_pool(host, port, user, password):
+    """ Return a pooled connection to the administrative 'postgres' database.
+
+    Pools are kept for the lifetime of the process and reused across
+    create/drop calls, so administrative commands don't pay for a fresh
+    connection each time. They are closed on interpreter exit.
+
+    The pool runs in multi-connection mode because it is shared process-wide:
+    the queue gives each concurrent caller exclusive checkout of a connection,
+    whereas single-connection mode would hand the same connection to all of
+    them.
+    """
+    key = (host, port, user, password)
+    try:
+        return _ADMIN_POOLS[key]
+    except KeyError:
+        # Deferred so importing the module doesn't drag in gevent
+        from .pool import PostgresConnectionPool
+        pool = PostgresConnectionPool(host=host,
+                                      port=port,
+                                      dbname='postgres',
+                                      user=user,
+                                      password=password,
+                                      maxsize=DEFAULT_MAX_POOL_SIZE)
+        _ADMIN_POOLS[key] = pool
+        return pool
+
+
+@atexit.register
+def close_admin_pools():
+    while _ADMIN_POOLS:
+        (key, pool) = _ADMIN_POOLS.popitem()
+        pool.closeall()
+
+
 class Database(object):
 
     migrate = staticmethod(migrate)
@@ -69,10 +106,13 @@ class Database(object):
         """ Ensure any SQLExpression instances are serialized"""
         @functools.wraps(func)
         def wrapper(self, query, *args, **kwargs):
-            if hasattr(query, 'serialize'):
+            # Plain strings are the common case, so skip the serialization
+            # machinery for them entirely
+            if not isinstance(query, basestring):
                 query = query.serialize()
+                assert isinstance(query, basestring), \
+                    'Expected query to be string'
 
-            assert isinstance(query, basestring), 'Expected query to be string'
             if self.debug:
                 print('SQL:', query)
 
@@ -114,12 +154,7 @@ class Database(object):
 
     @staticmethod
     def command(host, port, dbname, user, password, maxsize, sql):
-        pool = PostgresConnectionPool(host=host,
-                                      port=port,
-                                      dbname='postgres',
-                                      user=user,
-                                      password=password,
-                                      maxsize=maxsize)
+        pool = get_admin_pool(host, port, user, password)
         pool.execute(sql, isolation_level=AUTOCOMMIT)
 
     @classmethod
@@ -132,14 +167,29 @@ class Database(object):
         sql = 'DROP DATABASE {};'.format(dbname)
         cls.command(host, port, dbname, user, password, maxsize, sql)
 
+    @classmethod
+    def drop_and_create(cls, host, port, dbname, user, password, maxsize):
+        # DROP/CREATE DATABASE cannot share a multi-statement string (they
+        # are not allowed inside the implicit transaction block), but both
+        # statements reuse the same admin connection
+        pool = get_admin_pool(host, port, user, password)
+        pool.execute('DROP DATABASE IF EXISTS {};'.format(dbname),
+                     isolation_level=AUTOCOMMIT)
+        pool.execute('CREATE DATABASE {};'.format(dbname),
+                     isolation_level=AUTOCOMMIT)
+
     def recreate(self):
         self.close()
-        call_relevant_args(self.drop, self.connection_params)
-        call_relevant_args(self.create, self.connection_params)
+        call_relevant_args(self.drop_and_create, self.connection_params)
 
     @classmethod
     def connect(cls, host, port, database, user, password,
                 maxsize=DEFAULT_MAX_POOL_SIZE, debug=False):
+        from psycopg2.extras import DictCursor
+        from .pool import PostgresConnectionPool
+        # Registered here rather than at import so consumers that never open
+        # a pool don't pay for it; re-registration is a cheap no-op
+        psycopg2.extensions.register_type(psycopg2.extensions.UNICODEARRAY)
         kwargs = dict(host=host,
                       port=port,
                       dbname=database,
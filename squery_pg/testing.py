@@ -3,20 +3,28 @@ This module contains classes and functions useful when testing an application
 using squery-pg.
 """
 
-import os
-import hashlib
+import secrets
+import functools
+
+import gevent
+from psycopg2.extras import execute_values
 
 from .squery_pg import Database
 
 
+@functools.lru_cache(maxsize=256)
+def insert_sql(table, columns):
+    """
+    Return the INSERT statement template for the given table and column set.
+    """
+    return 'INSERT INTO {} ({}) VALUES %s'.format(table, ', '.join(columns))
+
+
 def random_name(prefix='test'):
     """
     Return random name that can be used to create the test database.
     """
-    rndbytes = os.urandom(8)
-    md5 = hashlib.md5()
-    md5.update(rndbytes)
-    return '{}_{}'.format(prefix, md5.hexdigest()[:7])
+    return '{}_{}'.format(prefix, secrets.token_hex(4))
 
 
 class TestContainer(object):
@@ -50,7 +58,12 @@ class TestContainer(object):
     5432, 'postgres' and ``None``, respectively.
     """
 
-    MAX_POOL_SIZE = 1  # This can only be 1 so gevent doesn't get used
+    # Each database keeps a single connection. That is safe with the parallel
+    # set-up/tear-down because the greenlets are fanned out per database, so
+    # no two greenlets ever share a database's connection; shared DDL goes
+    # through the multi-connection admin pool, which hands each greenlet its
+    # own connection.
+    MAX_POOL_SIZE = 1
 
     def __init__(self, databases, conf={}, host='localhost', port=5432,
                  user='postgres', password=None):
@@ -87,16 +100,23 @@ class TestContainer(object):
         epxeced to be an iterable of dicts.
         """
         db = self.databases[dbname]['db']
-        db.execute('BEGIN')
+        # Rows may not all share the same keys, so group them by column set
+        # and load each group with a single batched INSERT
+        groups = {}
         for row in data:
-            columns = row.keys()
-            q = db.Insert(table, cols=columns)
-            db.execute(q, row)
-        db.execute('COMMIT')
+            columns = tuple(sorted(row.keys()))
+            groups.setdefault(columns, []).append(
+                tuple(row[column] for column in columns))
+        with db.transaction() as cursor:
+            for columns, rows in groups.items():
+                execute_values(cursor, insert_sql(table, columns), rows,
+                               page_size=500)
 
     def setupall(self):
-        for dbname in self.databases:
-            self.setup(dbname)
+        # Databases are independent, so their network-bound set-up can be
+        # overlapped in greenlets instead of run back to back
+        gevent.joinall([gevent.spawn(self.setup, dbname)
+                        for dbname in self.databases], raise_error=True)
 
     def setup(self, dbname):
         db = self.databases[dbname]['db']
@@ -107,8 +127,8 @@ class TestContainer(object):
                 db.migrate(db, dbset['name'], dbset['migrations'], self.conf)
 
     def teardownall(self):
-        for dbname in self.databases:
-            self.teardown(dbname)
+        gevent.joinall([gevent.spawn(self.teardown, dbname)
+                        for dbname in self.databases], raise_error=True)
 
     def teardown(self, dbname):
         name = self.databases[dbname]['name']